@@ -1,7 +1,7 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from typing import AsyncIterator
-from api.app.routers import jobs
+from api.app.routers import events, jobs, stats
 from common.db.session import engine
 from common.db.base import Base
 from common.db.utils import wait_for_db
@@ -35,6 +35,8 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
 
 app = FastAPI(lifespan=lifespan)
 app.include_router(jobs.router)
+app.include_router(stats.router)
+app.include_router(events.router)
 
 
 @app.get("/health")
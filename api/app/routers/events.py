@@ -0,0 +1,115 @@
+import json
+from typing import List, Optional
+
+import redis
+from fastapi import (
+    APIRouter, Header, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status as http_status
+)
+from fastapi.responses import StreamingResponse
+
+from common.db.models import JobRunStatus
+from common.redis.events import is_valid_event_id, read_run_events
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+
+def status_filter(status: Optional[List[JobRunStatus]]) -> set[str] | None:
+    return {s.value for s in status} if status else None
+
+
+@router.get("/runs")
+async def stream_run_events(
+    request: Request,
+    job_id: Optional[int] = None,
+    status: Optional[List[JobRunStatus]] = Query(None),
+    after: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    Server-Sent Events feed of JobRun state transitions.
+
+    Resume by passing the last seen event id as `after` (or the standard
+    `Last-Event-ID` header, which browsers send on reconnect).
+    """
+
+    after = after or last_event_id
+    if after is not None and not is_valid_event_id(after):
+        raise HTTPException(status_code=400, detail="Invalid event id")
+
+    events = read_run_events(
+        after=after,
+        job_id=job_id,
+        statuses=status_filter(status),
+    )
+
+    async def sse():
+        # Headers are already sent by the time Redis can fail, so report it
+        # in-band and end the stream; clients reconnect with Last-Event-ID.
+        try:
+            async for item in events:
+                if item is None:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+
+                event_id, fields = item
+                yield f"id: {event_id}\nevent: {fields['event']}\ndata: {json.dumps(fields)}\n\n"
+        except redis.RedisError:
+            yield 'event: error\ndata: {"detail": "Event stream unavailable"}\n\n'
+        finally:
+            await events.aclose()
+
+    return StreamingResponse(
+        sse(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/runs/ws")
+async def websocket_run_events(
+    websocket: WebSocket,
+    job_id: Optional[int] = None,
+    status: Optional[List[JobRunStatus]] = Query(None),
+    after: Optional[str] = None,
+):
+    """
+    Same feed as `/events/runs`, one JSON message per event.
+
+    A `{"event": "keepalive"}` message is sent whenever the feed is idle,
+    which is also how a disconnected client gets noticed.
+    """
+
+    # Accept first: closing during the handshake becomes an HTTP 403 and
+    # the client never sees the close code.
+    await websocket.accept()
+
+    if after is not None and not is_valid_event_id(after):
+        await websocket.close(
+            code=http_status.WS_1008_POLICY_VIOLATION, reason="Invalid event id"
+        )
+        return
+
+    events = read_run_events(
+        after=after,
+        job_id=job_id,
+        statuses=status_filter(status),
+    )
+
+    try:
+        async for item in events:
+            if item is None:
+                await websocket.send_json({"event": "keepalive"})
+                continue
+
+            event_id, fields = item
+            await websocket.send_json({"id": event_id, **fields})
+    except WebSocketDisconnect:
+        pass
+    except redis.RedisError:
+        await websocket.close(
+            code=http_status.WS_1011_INTERNAL_ERROR, reason="Event stream unavailable"
+        )
+    finally:
+        await events.aclose()
@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import select, desc
 
-from common.db.models import Job, JobRun
-from api.app.schemas import JobCreate, JobResponse, JobRunResponse, JobWithRecentRunsResponse
+from common.db.models import Job, JobRun, JobRunStatsHourly
+from api.app.schemas import (
+    JobCreate, JobResponse, JobRunResponse, JobWithRecentRunsResponse, RunStatsResponse
+)
 from api.app.deps import get_db
+from api.app.routers.stats import MAX_WINDOW_HOURS, summarize_rollups, window_start
 
 
 router = APIRouter(prefix="/jobs", tags=["jobs"])
@@ -67,3 +70,26 @@ def list_job_runs(job_id: int, db: Session = Depends(get_db)):
     ).scalars().all()
 
     return job_runs
+
+@router.get("/{job_id}/stats", response_model=RunStatsResponse)
+def get_job_stats(
+    job_id: int,
+    hours: int = Query(24, ge=1, le=MAX_WINDOW_HOURS),
+    db: Session = Depends(get_db),
+):
+    job_exists = db.execute(
+        select(Job.id).where(Job.id == job_id)
+    ).scalar_one_or_none()
+
+    if not job_exists:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    rows = db.execute(
+        select(JobRunStatsHourly)
+        .where(
+            JobRunStatsHourly.job_id == job_id,
+            JobRunStatsHourly.bucket_start >= window_start(hours),
+        )
+    ).scalars().all()
+
+    return summarize_rollups(rows, hours, job_id=job_id)
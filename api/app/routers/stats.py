@@ -0,0 +1,77 @@
+from datetime import datetime, timezone, timedelta
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+
+from common.db.models import FleetRunStatsHourly, DURATION_BUCKETS_SEC, LAG_BUCKETS_SEC
+from common.db.stats import hour_bucket
+from api.app.schemas import RunStatsResponse
+from api.app.deps import get_db
+
+UTC = timezone.utc
+MAX_WINDOW_HOURS = 24 * 30
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+
+def summarize_rollups(rows, window_hours: int, job_id: int | None = None) -> RunStatsResponse:
+    """Sum hourly rollup rows into a single stats response."""
+
+    totals = {
+        "success_count": 0,
+        "failed_count": 0,
+        "retry_count": 0,
+        "zombie_count": 0,
+        "attempts": 0,
+    }
+    duration_sum = 0.0
+    lag_sum = 0.0
+    duration_hist = [0] * (len(DURATION_BUCKETS_SEC) + 1)
+    lag_hist = [0] * (len(LAG_BUCKETS_SEC) + 1)
+
+    for row in rows:
+        for name in totals:
+            totals[name] += getattr(row, name)
+        duration_sum += row.duration_sum_sec
+        lag_sum += row.lag_sum_sec
+        duration_hist = [a + b for a, b in zip(duration_hist, row.duration_hist)]
+        lag_hist = [a + b for a, b in zip(lag_hist, row.lag_hist)]
+
+    finished = totals["success_count"] + totals["failed_count"]
+    duration_samples = sum(duration_hist)
+    lag_samples = sum(lag_hist)
+
+    return RunStatsResponse(
+        job_id=job_id,
+        window_hours=window_hours,
+        **totals,
+        success_rate=totals["success_count"] / finished if finished else None,
+        avg_duration_sec=duration_sum / duration_samples if duration_samples else None,
+        avg_lag_sec=lag_sum / lag_samples if lag_samples else None,
+        duration_histogram=[
+            {"le": le, "count": n}
+            for le, n in zip((*DURATION_BUCKETS_SEC, None), duration_hist)
+        ],
+        lag_histogram=[
+            {"le": le, "count": n}
+            for le, n in zip((*LAG_BUCKETS_SEC, None), lag_hist)
+        ],
+    )
+
+
+def window_start(hours: int) -> datetime:
+    return hour_bucket(datetime.now(UTC)) - timedelta(hours=hours - 1)
+
+
+@router.get("", response_model=RunStatsResponse)
+def get_fleet_stats(
+    hours: int = Query(24, ge=1, le=MAX_WINDOW_HOURS),
+    db: Session = Depends(get_db),
+):
+    rows = db.execute(
+        select(FleetRunStatsHourly)
+        .where(FleetRunStatsHourly.bucket_start >= window_start(hours))
+    ).scalars().all()
+
+    return summarize_rollups(rows, hours)
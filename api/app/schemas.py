@@ -45,4 +45,23 @@ class JobResponse(BaseModel):
 
 
 class JobWithRecentRunsResponse(JobResponse):
-    recent_runs: List[JobRunResponse]
\ No newline at end of file
+    recent_runs: List[JobRunResponse]
+
+class HistogramBucket(BaseModel):
+    le: Optional[float]  # inclusive upper bound in seconds, None = overflow
+    count: int
+
+
+class RunStatsResponse(BaseModel):
+    job_id: Optional[int] = None
+    window_hours: int
+    success_count: int
+    failed_count: int
+    retry_count: int
+    zombie_count: int
+    attempts: int
+    success_rate: Optional[float]
+    avg_duration_sec: Optional[float]
+    avg_lag_sec: Optional[float]
+    duration_histogram: List[HistogramBucket]
+    lag_histogram: List[HistogramBucket]
@@ -0,0 +1,64 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone, timedelta
+
+UTC = timezone.utc
+
+
+class Clock(ABC):
+    """
+    Source of "now" and of waiting for the scheduler / worker loops.
+
+    Production uses SystemClock. The simulator injects a VirtualClock into
+    the scheduler / worker step functions so hours of cron schedules, retry
+    delays and zombie timeouts play out without real waiting. VirtualClock
+    is not thread-safe; only the simulator's single-threaded loop uses it.
+    """
+
+    @abstractmethod
+    def now(self) -> datetime: ...
+
+    @abstractmethod
+    def sleep(self, seconds: float): ...
+
+    @abstractmethod
+    def wait(self, event: threading.Event, seconds: float) -> bool:
+        """Like `event.wait(seconds)`: returns True if the event is set."""
+
+
+class SystemClock(Clock):
+    def now(self) -> datetime:
+        return datetime.now(UTC)
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+    def wait(self, event: threading.Event, seconds: float) -> bool:
+        return event.wait(seconds)
+
+
+class VirtualClock(Clock):
+    """Clock that only moves when told to. Sleeping advances it instantly."""
+
+    def __init__(self, start: datetime):
+        self._now = start
+
+    def now(self) -> datetime:
+        return self._now
+
+    def advance_to(self, when: datetime):
+        if when < self._now:
+            raise ValueError(f"cannot move clock backwards: {when} < {self._now}")
+        self._now = when
+
+    def sleep(self, seconds: float):
+        self._now += timedelta(seconds=seconds)
+
+    def wait(self, event: threading.Event, seconds: float) -> bool:
+        if not event.is_set():
+            self.sleep(seconds)
+        return event.is_set()
+
+
+SYSTEM_CLOCK = SystemClock()
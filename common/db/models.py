@@ -6,6 +6,7 @@ from sqlalchemy import (
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import ARRAY
 
 from .base import Base
 
@@ -81,3 +82,47 @@ class JobRun(Base):
     )
 
     __repr__ = lambda self: f"JobRun(id={self.id}, job_id={self.job_id}, scheduled_time={self.scheduled_time}, status={self.status}, attempt_number={self.attempt_number}, started_at={self.started_at}, finished_at={self.finished_at}, error_message={self.error_message}, worker_id={self.worker_id}, created_at={self.created_at})"
+
+
+# Upper bounds (inclusive, seconds) of the histogram buckets kept by the
+# run stats rollups. A final overflow bucket catches everything above.
+DURATION_BUCKETS_SEC = (1, 5, 10, 30, 60, 300, 900, 3600)
+LAG_BUCKETS_SEC = (1, 2, 5, 10, 30, 60, 300)
+
+# The fleet rollup is split into this many rows per hour (by job_id) so
+# concurrent workers don't all queue on one row lock. Readers sum the shards.
+FLEET_STATS_SHARDS = 16
+
+
+class RunStatsColumns:
+    """Counters shared by the per-job and fleet-wide hourly rollups."""
+
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+
+    success_count = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    failed_count = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    retry_count = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    zombie_count = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    attempts = Column(Integer, nullable=False, default=0, server_default=text("0"))
+
+    duration_sum_sec = Column(Float, nullable=False, default=0, server_default=text("0"))
+    duration_hist = Column(ARRAY(Integer, zero_indexes=True), nullable=False)
+
+    lag_sum_sec = Column(Float, nullable=False, default=0, server_default=text("0"))
+    lag_hist = Column(ARRAY(Integer, zero_indexes=True), nullable=False)
+
+
+class JobRunStatsHourly(RunStatsColumns, Base):
+    __tablename__ = "job_run_stats_hourly"
+
+    job_id = Column(Integer, ForeignKey("jobs.id"), primary_key=True)
+
+    __repr__ = lambda self: f"JobRunStatsHourly(job_id={self.job_id}, bucket_start={self.bucket_start}, success_count={self.success_count}, failed_count={self.failed_count}, retry_count={self.retry_count}, zombie_count={self.zombie_count}, attempts={self.attempts})"
+
+
+class FleetRunStatsHourly(RunStatsColumns, Base):
+    __tablename__ = "fleet_run_stats_hourly"
+
+    shard = Column(Integer, primary_key=True)
+
+    __repr__ = lambda self: f"FleetRunStatsHourly(bucket_start={self.bucket_start}, shard={self.shard}, success_count={self.success_count}, failed_count={self.failed_count}, retry_count={self.retry_count}, zombie_count={self.zombie_count}, attempts={self.attempts})"
@@ -0,0 +1,157 @@
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy.dialects.postgresql import array, insert
+
+from common.db.models import (
+    JobRun,
+    JobRunStatus,
+    JobRunStatsHourly,
+    FleetRunStatsHourly,
+    FLEET_STATS_SHARDS,
+    DURATION_BUCKETS_SEC,
+    LAG_BUCKETS_SEC,
+)
+
+STATUS_COUNTERS = {
+    JobRunStatus.SUCCESS: "success_count",
+    JobRunStatus.FAILED: "failed_count",
+    JobRunStatus.RETRY: "retry_count",
+}
+
+
+def hour_bucket(ts: datetime) -> datetime:
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def bucket_index(bounds: tuple, value: float) -> int:
+    return bisect_left(bounds, value)
+
+
+def run_outcome_delta(
+    job_run: JobRun,
+    status: JobRunStatus,
+    finished_at: datetime,
+    scheduled_time: datetime | None = None,
+    zombie: bool = False,
+) -> Counter:
+    """
+    Describe one finished attempt as increments to a rollup row.
+
+    Keys are column names, or `(array_column, index)` for histogram buckets.
+    `scheduled_time` is the time the attempt was due; pass it explicitly
+    when the caller has already moved `job_run.scheduled_time` for a retry.
+    """
+
+    scheduled_time = scheduled_time or job_run.scheduled_time
+    started_at = job_run.started_at
+
+    delta = Counter({"attempts": 1, STATUS_COUNTERS[status]: 1})
+    if zombie:
+        delta["zombie_count"] += 1
+
+    if started_at is not None:
+        end = job_run.last_heartbeat_at if zombie else finished_at
+        if end is not None:
+            duration = max((end - started_at).total_seconds(), 0.0)
+            delta["duration_sum_sec"] += duration
+            delta[("duration_hist", bucket_index(DURATION_BUCKETS_SEC, duration))] += 1
+
+        lag = max((started_at - scheduled_time).total_seconds(), 0.0)
+        delta["lag_sum_sec"] += lag
+        delta[("lag_hist", bucket_index(LAG_BUCKETS_SEC, lag))] += 1
+
+    return delta
+
+
+HIST_COLUMNS = {
+    "duration_hist": len(DURATION_BUCKETS_SEC) + 1,
+    "lag_hist": len(LAG_BUCKETS_SEC) + 1,
+}
+SUM_COLUMNS = (
+    "success_count",
+    "failed_count",
+    "retry_count",
+    "zombie_count",
+    "attempts",
+    "duration_sum_sec",
+    "lag_sum_sec",
+)
+
+
+def _upsert(db, table, key_values: dict, delta: Counter):
+    # One statement per row: insert the delta, or add it to the existing row.
+    values = dict(key_values)
+    for name in SUM_COLUMNS:
+        values[name] = delta[name]
+    for name, size in HIST_COLUMNS.items():
+        values[name] = [delta[(name, i)] for i in range(size)]
+
+    stmt = insert(table).values(values)
+    c = table.c
+    set_ = {name: c[name] + stmt.excluded[name] for name in SUM_COLUMNS}
+    for name, size in HIST_COLUMNS.items():
+        set_[name] = array([c[name][i] + stmt.excluded[name][i] for i in range(size)])
+
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=list(key_values),
+            set_=set_,
+        )
+    )
+
+
+def apply_run_outcomes(db, outcomes: list[tuple[int, datetime, Counter]]):
+    """
+    Fold `(job_id, hour_bucket, delta)` outcomes into the hourly rollups.
+
+    Runs in the caller's transaction, so the rollups commit (or roll back)
+    together with the runs' state changes. Rows are always locked in the
+    same order -- fleet shards by (hour, shard), then job rows by
+    (job_id, hour) -- so concurrent workers and the reaper can't deadlock.
+    """
+
+    fleet = {}
+    per_job = {}
+    for job_id, bucket, delta in outcomes:
+        fleet.setdefault((bucket, job_id % FLEET_STATS_SHARDS), Counter()).update(delta)
+        per_job.setdefault((job_id, bucket), Counter()).update(delta)
+
+    fleet_table = FleetRunStatsHourly.__table__
+    for bucket, shard in sorted(fleet):
+        _upsert(
+            db,
+            fleet_table,
+            {"bucket_start": bucket, "shard": shard},
+            fleet[(bucket, shard)],
+        )
+
+    job_table = JobRunStatsHourly.__table__
+    for job_id, bucket in sorted(per_job):
+        _upsert(
+            db,
+            job_table,
+            {"job_id": job_id, "bucket_start": bucket},
+            per_job[(job_id, bucket)],
+        )
+
+
+def record_run_outcome(
+    db,
+    job_run: JobRun,
+    status: JobRunStatus,
+    finished_at: datetime,
+    scheduled_time: datetime | None = None,
+    zombie: bool = False,
+):
+    """Fold one finished attempt into the hourly rollups. Call before commit."""
+
+    apply_run_outcomes(
+        db,
+        [(
+            job_run.job_id,
+            hour_bucket(finished_at),
+            run_outcome_delta(job_run, status, finished_at, scheduled_time, zombie),
+        )],
+    )
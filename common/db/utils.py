@@ -2,10 +2,10 @@ import time
 from sqlalchemy import text
 from common.db.session import engine
 
-def wait_for_db():
+def wait_for_db(db_engine=engine):
     while True:
         try:
-            with engine.connect() as conn:
+            with db_engine.connect() as conn:
                 conn.execute(text("SELECT 1"))
             print("DB is reachable")
             return
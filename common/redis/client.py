@@ -1,5 +1,6 @@
 import os
 import redis
+import redis.asyncio
 
 # REDIS_URL = os.getenv("REDIS_URL", "redis-17889.c301.ap-south-1-1.ec2.cloud.redislabs.com:17889")
 REDIS_HOST = os.getenv("REDIS_HOST")
@@ -15,3 +16,12 @@ redis_client = redis.Redis(
     password=REDIS_PASSWORD,
 )
 
+# Used by the API for long-lived blocking reads (event streams) so they
+# don't tie up the event loop or threadpool.
+async_redis_client = redis.asyncio.Redis(
+    host=REDIS_HOST,
+    port=REDIS_PORT,
+    decode_responses=True,
+    username=REDIS_USERNAME,
+    password=REDIS_PASSWORD,
+)
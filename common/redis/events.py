@@ -0,0 +1,111 @@
+import re
+from datetime import datetime, timezone
+from typing import AsyncIterator
+
+import redis
+
+from common.redis import keys
+from common.redis.client import redis_client, async_redis_client
+
+UTC = timezone.utc
+RUN_EVENTS_MAXLEN = 100_000  # approximate; oldest events are trimmed first
+READ_BLOCK_MS = 15_000
+EVENT_ID_RE = re.compile(r"^\d+(-\d+)?$")
+
+
+def is_valid_event_id(event_id: str) -> bool:
+    return bool(EVENT_ID_RE.match(event_id))
+
+
+def run_event(event: str, job_run, at: datetime | None = None) -> dict:
+    """
+    Snapshot a JobRun state transition as stream fields.
+
+    Build this before committing the transition (committing expires the
+    run, so reading it afterwards costs a SELECT) and publish it after.
+    """
+
+    fields = {
+        "event": event,
+        "job_run_id": job_run.id,
+        "job_id": job_run.job_id,
+        "status": job_run.status.value,
+        "attempt_number": job_run.attempt_number,
+        "scheduled_time": job_run.scheduled_time.isoformat(),
+        "worker_id": job_run.worker_id,
+        "timestamp": (at or datetime.now(UTC)).isoformat(),
+    }
+    return {k: v for k, v in fields.items() if v is not None}
+
+
+def publish_run_event(fields: dict, logger=None):
+    """
+    Append a `run_event()` snapshot to the run events stream.
+
+    Call this after the transition is committed. Publishing is best-effort:
+    a Redis failure is logged and never breaks the caller's execution flow.
+    """
+
+    try:
+        redis_client.xadd(
+            keys.RUN_EVENTS_STREAM,
+            fields,
+            maxlen=RUN_EVENTS_MAXLEN,
+            approximate=True,
+        )
+    except redis.RedisError as e:
+        if logger:
+            logger.log(
+                event="run_event_publish_failed",
+                run_event=fields["event"],
+                job_run_id=fields["job_run_id"],
+                error=str(e),
+            )
+
+
+async def latest_event_id() -> str:
+    entries = await async_redis_client.xrevrange(keys.RUN_EVENTS_STREAM, count=1)
+    return entries[0][0] if entries else "0-0"
+
+
+async def read_run_events(
+    after: str | None = None,
+    job_id: int | None = None,
+    statuses: set[str] | None = None,
+) -> AsyncIterator[tuple[str, dict] | None]:
+    """
+    Yield `(event_id, fields)` for run events newer than `after`.
+
+    With no `after`, only events published from now on are returned.
+    Yields None whenever a blocking read times out so callers can send
+    keepalives and notice disconnected clients.
+    """
+
+    if after is not None and not is_valid_event_id(after):
+        raise ValueError(f"invalid event id: {after!r}")
+
+    # Resolve "now" to a concrete id once; re-reading with "$" would drop
+    # anything published between two reads.
+    last_id = after or await latest_event_id()
+
+    while True:
+        batches = await async_redis_client.xread(
+            {keys.RUN_EVENTS_STREAM: last_id},
+            block=READ_BLOCK_MS,
+            count=100,
+        )
+
+        if not batches:
+            yield None
+            continue
+
+        for _, entries in batches:
+            for event_id, fields in entries:
+                last_id = event_id
+
+                if job_id is not None and fields.get("job_id") != str(job_id):
+                    continue
+                if statuses and fields.get("status") not in statuses:
+                    continue
+
+                yield event_id, fields
@@ -0,0 +1,11 @@
+# Redis key names shared by the services. Read them as `keys.NAME` at call
+# time (not `from ... import NAME`) so a simulation can move everything into
+# its own namespace with `use_namespace`.
+RUN_EVENTS_STREAM = "job_run_events"
+RUNNING_JOB_RUNS = "running_job_runs"
+
+
+def use_namespace(prefix: str):
+    global RUN_EVENTS_STREAM, RUNNING_JOB_RUNS
+    RUN_EVENTS_STREAM = f"{prefix}:job_run_events"
+    RUNNING_JOB_RUNS = f"{prefix}:running_job_runs"
@@ -1,4 +1,3 @@
-import time
 from datetime import datetime, timezone, timedelta
 
 from sqlalchemy import select, desc
@@ -6,11 +5,15 @@ from sqlalchemy.exc import IntegrityError, ProgrammingError
 
 from croniter import croniter
 
+from common.clock import Clock, SYSTEM_CLOCK
 from common.db.session import SessionLocal
 from common.db.models import Job, JobRun, JobRunStatus
+from common.db.stats import apply_run_outcomes, hour_bucket, run_outcome_delta
 from common.db.utils import wait_for_db
 from common.logging.logger import StructuredLogger
+from common.redis import keys
 from common.redis.client import redis_client
+from common.redis.events import publish_run_event, run_event
 
 logger = StructuredLogger(
     name="scheduler",
@@ -32,14 +35,17 @@ def add_job_run(db, job_id: int, scheduled_time: datetime):
     try:
         db.add(jr)
         db.commit()
+        return True
     except IntegrityError:
         db.rollback()
+        return False
 
 
-def reap_zombie_runs(db):
+def reap_zombie_runs(db, clock: Clock = SYSTEM_CLOCK):
     """
     Convert dead RUNNING jobs into RETRY or FAILED.
     Scheduler NEVER sets started_at / finished_at.
+    Returns the (event, fields) transitions it made.
     """
 
     zombie_runs = (
@@ -47,7 +53,7 @@ def reap_zombie_runs(db):
             select(JobRun)
             .where(
                 JobRun.status == JobRunStatus.RUNNING,
-                JobRun.last_heartbeat_at < datetime.now(UTC)- timedelta(seconds=ZOMBIE_TIMEOUT_SEC),
+                JobRun.last_heartbeat_at < clock.now() - timedelta(seconds=ZOMBIE_TIMEOUT_SEC),
             )
             .with_for_update(skip_locked=True)
         )
@@ -55,6 +61,10 @@ def reap_zombie_runs(db):
         .all()
     )
 
+    transitions = []
+    outcomes = []
+    now = clock.now()
+
     for jr in zombie_runs:
         logger.log(
             event="zombie_detected",
@@ -68,6 +78,7 @@ def reap_zombie_runs(db):
 
         if jr.attempt_number < job.max_retries:
             jr.status = JobRunStatus.RETRY
+            event = "zombie_recovered"
             logger.log(
                 event="zombie_recovered",
                 job_run_id=jr.id,
@@ -76,6 +87,7 @@ def reap_zombie_runs(db):
             )
         else:
             jr.status = JobRunStatus.FAILED
+            event = "zombie_failed"
             logger.log(
                 event="zombie_failed",
                 job_run_id=jr.id,
@@ -83,57 +95,85 @@ def reap_zombie_runs(db):
                 new_status=jr.status,
             )
 
+        outcomes.append(
+            (jr.job_id, hour_bucket(now), run_outcome_delta(jr, jr.status, now, zombie=True))
+        )
+
         jr.worker_id = None
-        redis_client.srem("running_job_runs", jr.id)
+        redis_client.srem(keys.RUNNING_JOB_RUNS, jr.id)
+        transitions.append((event, run_event(event, jr, now)))
 
+    apply_run_outcomes(db, outcomes)
     db.commit()
 
+    for _, fields in transitions:
+        publish_run_event(fields, logger)
 
-wait_for_db()
-logger.log(event="scheduler_started")
+    return transitions
 
-while True:
-    active_workers = redis_client.keys("worker:*")
-    running_jobs = redis_client.smembers("running_job_runs")
 
-    logger.log(
-        event="cluster_state",
-        active_workers=len(active_workers),
-        running_jobs=len(running_jobs),
-    )
+def schedule_due_runs(db, clock: Clock = SYSTEM_CLOCK):
+    """
+    Create the next JobRun for every active job whose cron time has come.
+    Returns the (job_id, scheduled_time) pairs that were created.
+    """
 
-    db = SessionLocal()
-    try:
-        reap_zombie_runs(db)
-
-        jobs = db.execute(select(Job).where(Job.is_active == True)).scalars().all()
-
-        for job in jobs:
-            last_run = (
-                db.execute(
-                    select(JobRun)
-                    .where(JobRun.job_id == job.id)
-                    .order_by(desc(JobRun.scheduled_time))
-                    .limit(1)
-                )
-                .scalar_one_or_none()
+    scheduled = []
+    jobs = db.execute(select(Job).where(Job.is_active == True)).scalars().all()
+
+    for job in jobs:
+        last_run = (
+            db.execute(
+                select(JobRun)
+                .where(JobRun.job_id == job.id)
+                .order_by(desc(JobRun.scheduled_time))
+                .limit(1)
+            )
+            .scalar_one_or_none()
+        )
+
+        base_time = last_run.scheduled_time if last_run else job.created_at
+        next_run = croniter(job.schedule, base_time).get_next(datetime)
+
+        if next_run <= clock.now():
+            if add_job_run(db, job.id, next_run):
+                scheduled.append((job.id, next_run))
+            logger.log(
+                event="job_scheduled",
+                job_id=job.id,
+                scheduled_time=next_run,
             )
 
-            base_time = last_run.scheduled_time if last_run else job.created_at
-            next_run = croniter(job.schedule, base_time).get_next(datetime)
+    return scheduled
 
-            if next_run <= datetime.now(UTC):
-                add_job_run(db, job.id, next_run)
-                logger.log(
-                    event="job_scheduled",
-                    job_id=job.id,
-                    scheduled_time=next_run,
-                )
 
-    except ProgrammingError:
-        db.rollback()
-        time.sleep(5)
-    finally:
-        db.close()
+def run_scheduler(clock: Clock = SYSTEM_CLOCK):
+    wait_for_db()
+    logger.log(event="scheduler_started")
+
+    while True:
+        active_workers = redis_client.keys("worker:*")
+        running_jobs = redis_client.smembers(keys.RUNNING_JOB_RUNS)
+
+        logger.log(
+            event="cluster_state",
+            active_workers=len(active_workers),
+            running_jobs=len(running_jobs),
+        )
+
+        db = SessionLocal()
+        try:
+            reap_zombie_runs(db, clock)
+            schedule_due_runs(db, clock)
+
+        except ProgrammingError:
+            db.rollback()
+            clock.sleep(5)
+        finally:
+            db.close()
+
+        clock.sleep(SCHEDULER_INTERVAL_SEC)
+
 
-    time.sleep(SCHEDULER_INTERVAL_SEC)
+if __name__ == "__main__":
+    run_scheduler()
@@ -0,0 +1,455 @@
+"""
+Discrete-event simulation of the scheduler and a fleet of workers.
+
+Runs the real scheduler / worker step functions against Postgres and Redis,
+but on a VirtualClock: instead of sleeping, the simulation jumps straight to
+the next moment something can happen. Days of schedules play out in as long
+as the database needs to absorb the writes.
+
+Only one thing runs at a time, and ties are broken in insertion order, so a
+run is deterministic for a given seed and --start on a fresh database.
+
+The simulator never uses the services' POSTGRES_* database: it needs its own
+--database-url (or SIM_DATABASE_URL). Redis writes (run events, the running
+set) go to a separate "sim:" namespace so a simulation never shows up in the
+live event feed.
+
+    SIM_DATABASE_URL=postgresql+psycopg://postgres@localhost:5432/miniaf_sim \
+        python -m simulator.app.main --jobs 1000 --workers 20 --hours 24 --reset
+"""
+
+import argparse
+import heapq
+import itertools
+import logging
+import math
+import os
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone, timedelta
+
+from croniter import croniter
+from sqlalchemy import create_engine, select, func
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+
+from common.clock import VirtualClock
+from common.db.base import Base
+from common.db.session import DATABASE_URL as SERVICES_DATABASE_URL
+from common.db.models import Job, JobRunStatus
+from common.db.utils import wait_for_db
+from common.logging.logger import StructuredLogger
+from common.redis import keys
+from common.redis.client import redis_client
+from scheduler.app import main as scheduler
+from worker.app import main as worker
+
+logger = StructuredLogger(
+    name="simulator",
+    logfile="simulator.log",
+)
+
+UTC = timezone.utc
+SIM_REDIS_NAMESPACE = "sim"
+SIM_EPOCH = datetime(2025, 1, 1, tzinfo=UTC)  # default virtual start time
+WORKER_RESTART_SEC = 10  # how long a crashed worker stays down
+SCHEDULES = (
+    "* * * * *",
+    "*/5 * * * *",
+    "*/15 * * * *",
+    "0 * * * *",
+    "30 2 * * *",
+)
+
+
+@dataclass
+class SimWorker:
+    worker_id: str
+    idle_since: datetime
+    run_id: int | None = None
+    wake_at: datetime | None = None
+    last_heartbeat_at: datetime | None = None
+    down: bool = False
+
+
+class Simulation:
+    def __init__(
+        self,
+        clock: VirtualClock,
+        session_factory: sessionmaker,
+        workers: int,
+        crash_probability: float,
+        rng: random.Random,
+    ):
+        self.clock = clock
+        self.Session = session_factory
+        self.start = clock.now()
+        self.rng = rng
+        self.crash_probability = crash_probability
+
+        self.queue = []
+        self.seq = itertools.count()
+
+        # Mirror of what the scheduler derives from the DB each tick, so we
+        # only run ticks that would actually schedule or reap something.
+        self.schedules = {}
+        self.latest_scheduled = {}
+        self.next_due = {}
+        self.zombie_deadlines = []
+        self.next_tick_at = None
+        self.last_tick_at = None
+
+        # Spread the workers' poll phases over one POLL_INTERVAL_SEC.
+        self.workers = [
+            SimWorker(
+                worker_id=f"sim-worker-{i}",
+                idle_since=self.start - timedelta(seconds=worker.POLL_INTERVAL_SEC * i / workers),
+            )
+            for i in range(workers)
+        ]
+
+        self.stats = {
+            "events": 0,
+            "ticks": 0,
+            "runs_scheduled": 0,
+            "attempts": 0,
+            "success": 0,
+            "retry": 0,
+            "failed": 0,
+            "lost": 0,
+            "crashes": 0,
+            "zombie_recovered": 0,
+            "zombie_failed": 0,
+        }
+        self.lags = []
+
+    # -- event queue -------------------------------------------------------
+
+    def at(self, when: datetime, handler, *args):
+        heapq.heappush(self.queue, (when, next(self.seq), handler, args))
+
+    def run(self, until: datetime):
+        progress_at = self.start + timedelta(hours=1)
+
+        while self.queue and self.queue[0][0] <= until:
+            when, _, handler, args = heapq.heappop(self.queue)
+            self.clock.advance_to(when)
+
+            while when >= progress_at:
+                logger.log(event="simulation_progress", sim_time=progress_at, **self.stats)
+                progress_at += timedelta(hours=1)
+
+            handler(*args)
+            self.stats["events"] += 1
+
+        self.clock.advance_to(max(until, self.clock.now()))
+
+    # -- scheduler ---------------------------------------------------------
+
+    def load_jobs(self, db):
+        for job in db.execute(select(Job).where(Job.is_active == True)).scalars():
+            self.schedules[job.id] = job.schedule
+            self.note_scheduled(job.id, job.created_at)
+
+    def note_scheduled(self, job_id: int, scheduled_time: datetime):
+        latest = self.latest_scheduled.get(job_id)
+        if latest is None or scheduled_time > latest:
+            self.latest_scheduled[job_id] = scheduled_time
+            self.next_due[job_id] = croniter(self.schedules[job_id], scheduled_time).get_next(datetime)
+
+    def tick(self):
+        now = self.clock.now()
+        self.last_tick_at = now
+        self.stats["ticks"] += 1
+
+        db = self.Session()
+        try:
+            transitions = scheduler.reap_zombie_runs(db, self.clock)
+            scheduled = scheduler.schedule_due_runs(db, self.clock)
+        finally:
+            db.close()
+
+        for event, _ in transitions:
+            self.stats[event] += 1
+        for job_id, scheduled_time in scheduled:
+            self.note_scheduled(job_id, scheduled_time)
+        self.stats["runs_scheduled"] += len(scheduled)
+
+        while self.zombie_deadlines and self.zombie_deadlines[0] < now:
+            heapq.heappop(self.zombie_deadlines)
+
+        if transitions or scheduled:
+            self.wake_idle_workers()
+
+        self.schedule_next_tick()
+
+    def schedule_next_tick(self):
+        """Skip ahead to the first scheduler tick that has work to do."""
+
+        now = self.clock.now()
+        candidates = []
+        if self.next_due:
+            candidates.append(min(self.next_due.values()))
+        if self.zombie_deadlines:
+            # Reaped once last_heartbeat_at < now - ZOMBIE_TIMEOUT_SEC.
+            candidates.append(self.zombie_deadlines[0] + timedelta(microseconds=1))
+        if not candidates:
+            return
+
+        # The real loop ticks every SCHEDULER_INTERVAL_SEC from startup.
+        interval = scheduler.SCHEDULER_INTERVAL_SEC
+        target = max(min(candidates), now)
+        k = math.ceil((target - self.start).total_seconds() / interval)
+        tick_at = self.start + timedelta(seconds=k * interval)
+        if self.last_tick_at is not None and tick_at <= self.last_tick_at:
+            tick_at = self.last_tick_at + timedelta(seconds=interval)
+
+        if self.next_tick_at is None or self.next_tick_at <= now or tick_at < self.next_tick_at:
+            self.next_tick_at = tick_at
+            self.at(tick_at, self.tick_if_current, tick_at)
+
+    def tick_if_current(self, tick_at: datetime):
+        if self.next_tick_at == tick_at:
+            self.tick()
+
+    # -- workers -----------------------------------------------------------
+
+    def wake_idle_workers(self, when: datetime | None = None):
+        when = when or self.clock.now()
+        interval = worker.POLL_INTERVAL_SEC
+
+        for w in self.workers:
+            if w.run_id is not None or w.down:
+                continue
+
+            # An idle worker polls on its own POLL_INTERVAL_SEC grid.
+            k = max(1, math.ceil((when - w.idle_since).total_seconds() / interval))
+            poll_at = w.idle_since + timedelta(seconds=k * interval)
+
+            if w.wake_at is None or poll_at < w.wake_at:
+                w.wake_at = poll_at
+                self.at(poll_at, self.poll, w, poll_at)
+
+    def poll(self, w: SimWorker, poll_at: datetime):
+        if w.wake_at != poll_at or w.run_id is not None or w.down:
+            return
+        w.wake_at = None
+
+        now = self.clock.now()
+        db = self.Session()
+        try:
+            attempt = worker.begin_attempt(db, w.worker_id, self.clock, self.rng)
+            if not attempt:
+                w.idle_since = now
+                return
+
+            job_run = attempt.job_run
+            self.stats["attempts"] += 1
+            self.lags.append((job_run.started_at - job_run.scheduled_time).total_seconds())
+
+            w.run_id = job_run.id
+            w.last_heartbeat_at = job_run.last_heartbeat_at
+
+            if attempt.fails:
+                self.complete(db, w, attempt)
+                return
+
+            duration = timedelta(seconds=attempt.job.execution_time_sec)
+            if self.rng.random() < self.crash_probability:
+                self.at(now + duration * self.rng.random(), self.crash, w, job_run.id)
+            else:
+                self.at(now + duration, self.finish, w, job_run.id)
+
+            self.at(now + timedelta(seconds=worker.HEARTBEAT_INTERVAL_SEC), self.heartbeat, w, job_run.id)
+        finally:
+            db.close()
+
+    def heartbeat(self, w: SimWorker, run_id: int):
+        if w.run_id != run_id:
+            return
+
+        db = self.Session()
+        try:
+            worker.touch_heartbeat(db, run_id, w.worker_id, self.clock)
+        finally:
+            db.close()
+
+        w.last_heartbeat_at = self.clock.now().replace(microsecond=0)
+        self.at(self.clock.now() + timedelta(seconds=worker.HEARTBEAT_INTERVAL_SEC), self.heartbeat, w, run_id)
+
+    def finish(self, w: SimWorker, run_id: int):
+        if w.run_id != run_id:
+            return
+
+        db = self.Session()
+        try:
+            self.complete(db, w, worker.load_attempt(db, run_id, fails=False))
+        finally:
+            db.close()
+
+    def complete(self, db, w: SimWorker, attempt: worker.Attempt):
+        completed = worker.end_attempt(db, attempt, w.worker_id, self.clock)
+        job_run = attempt.job_run
+
+        if not completed:
+            self.stats["lost"] += 1
+        else:
+            self.stats[job_run.status.value.lower()] += 1
+
+        if completed and job_run.status == JobRunStatus.RETRY:
+            self.note_scheduled(job_run.job_id, job_run.scheduled_time)
+            self.at(job_run.scheduled_time, self.wake_idle_workers, job_run.scheduled_time)
+
+        # The worker loop goes straight back to claiming.
+        now = self.clock.now()
+        w.run_id = None
+        w.wake_at = now
+        self.at(now, self.poll, w, now)
+
+    def crash(self, w: SimWorker, run_id: int):
+        if w.run_id != run_id:
+            return
+
+        self.stats["crashes"] += 1
+        heapq.heappush(
+            self.zombie_deadlines,
+            w.last_heartbeat_at + timedelta(seconds=scheduler.ZOMBIE_TIMEOUT_SEC),
+        )
+        self.schedule_next_tick()
+
+        w.run_id = None
+        w.down = True
+        self.at(self.clock.now() + timedelta(seconds=WORKER_RESTART_SEC), self.restart, w)
+
+    def restart(self, w: SimWorker):
+        now = self.clock.now()
+        w.down = False
+        w.wake_at = now
+        self.at(now, self.poll, w, now)
+
+    # -- reporting ---------------------------------------------------------
+
+    def summary(self) -> dict:
+        lags = sorted(self.lags)
+
+        def pct(p):
+            return lags[min(len(lags) - 1, int(p * len(lags)))] if lags else None
+
+        return {
+            **self.stats,
+            "lag_avg_sec": sum(lags) / len(lags) if lags else None,
+            "lag_p50_sec": pct(0.50),
+            "lag_p99_sec": pct(0.99),
+            "lag_max_sec": lags[-1] if lags else None,
+        }
+
+
+def simulation_engine(database_url: str | None):
+    """
+    Engine for the simulation's own scratch database.
+
+    Refuses to run without an explicit URL, or against the database the
+    API / scheduler / worker are configured for -- --reset drops every table.
+    """
+
+    if not database_url:
+        raise SystemExit("pass --database-url or set SIM_DATABASE_URL to a scratch database")
+
+    url = make_url(database_url)
+    services = make_url(SERVICES_DATABASE_URL)
+    if (url.host, url.port or 5432, url.database) == (
+        services.host, services.port or 5432, services.database
+    ):
+        raise SystemExit("refusing to simulate against the services' POSTGRES_* database")
+
+    return create_engine(url, echo=False)
+
+
+def create_jobs(db, count: int, start: datetime, rng: random.Random):
+    for i in range(count):
+        db.add(
+            Job(
+                name=f"sim-job-{i}",
+                schedule=rng.choice(SCHEDULES),
+                execution_time_sec=rng.randint(1, 120),
+                failure_probability=round(rng.uniform(0.0, 0.3), 2),
+                max_retries=rng.randint(0, 3),
+                retry_delay_sec=rng.choice((0, 5, 30, 60)),
+                created_at=start,
+            )
+        )
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate miniAF on a virtual clock.")
+    parser.add_argument("--database-url", default=os.getenv("SIM_DATABASE_URL"),
+                        help="scratch database for the simulation (default: $SIM_DATABASE_URL)")
+    parser.add_argument("--jobs", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=5)
+    parser.add_argument("--hours", type=float, default=24)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--crash-probability", type=float, default=0.0,
+                        help="chance a worker dies mid-run, leaving a zombie")
+    parser.add_argument("--start", type=datetime.fromisoformat, default=SIM_EPOCH,
+                        help="virtual start time (ISO 8601, UTC); cron alignment depends on it")
+    parser.add_argument("--reset", action="store_true",
+                        help="drop and recreate all tables in the simulation database "
+                             "and clear the simulation's Redis keys")
+    parser.add_argument("--verbose", action="store_true",
+                        help="keep scheduler / worker event logs")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        scheduler.logger.logger.setLevel(logging.WARNING)
+        worker.logger.logger.setLevel(logging.WARNING)
+
+    keys.use_namespace(SIM_REDIS_NAMESPACE)
+
+    start = args.start.replace(tzinfo=args.start.tzinfo or UTC, microsecond=0)
+    rng = random.Random(args.seed)
+
+    engine = simulation_engine(args.database_url)
+    Session = sessionmaker(bind=engine)
+
+    wait_for_db(engine)
+    if args.reset:
+        Base.metadata.drop_all(bind=engine)
+        redis_client.delete(keys.RUN_EVENTS_STREAM, keys.RUNNING_JOB_RUNS)
+    Base.metadata.create_all(bind=engine)
+
+    db = Session()
+    try:
+        if db.execute(select(func.count(Job.id))).scalar_one():
+            raise SystemExit("jobs table is not empty; run against a scratch database with --reset")
+
+        create_jobs(db, args.jobs, start, rng)
+
+        clock = VirtualClock(start)
+        sim = Simulation(clock, Session, args.workers, args.crash_probability, rng)
+        sim.load_jobs(db)
+    finally:
+        db.close()
+
+    logger.log(event="simulation_started", start=start, jobs=args.jobs, workers=args.workers, hours=args.hours, seed=args.seed)
+
+    sim.next_tick_at = start
+    sim.at(start, sim.tick_if_current, start)
+    sim.wake_idle_workers(start)
+
+    t0 = time.monotonic()
+    sim.run(until=start + timedelta(hours=args.hours))
+    wall_sec = time.monotonic() - t0
+
+    logger.log(
+        event="simulation_finished",
+        sim_hours=args.hours,
+        wall_sec=round(wall_sec, 2),
+        speedup=round(args.hours * 3600 / wall_sec) if wall_sec else None,
+        **sim.summary(),
+    )
+
+
+if __name__ == "__main__":
+    main()
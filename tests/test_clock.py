@@ -0,0 +1,52 @@
+import threading
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+from common.clock import Clock, SystemClock, VirtualClock
+
+UTC = timezone.utc
+T0 = datetime(2025, 1, 1, tzinfo=UTC)
+
+
+def test_clock_is_abstract():
+    with pytest.raises(TypeError):
+        Clock()
+
+
+def test_system_clock_is_utc():
+    assert SystemClock().now().tzinfo == UTC
+
+
+def test_virtual_clock_only_moves_when_told():
+    clock = VirtualClock(T0)
+    assert clock.now() == T0
+
+    clock.sleep(2.5)
+    assert clock.now() == T0 + timedelta(seconds=2.5)
+
+    clock.advance_to(T0 + timedelta(hours=1))
+    assert clock.now() == T0 + timedelta(hours=1)
+
+
+def test_virtual_clock_refuses_to_go_backwards():
+    clock = VirtualClock(T0 + timedelta(seconds=10))
+
+    with pytest.raises(ValueError):
+        clock.advance_to(T0)
+
+
+def test_virtual_wait_returns_immediately_when_set():
+    clock = VirtualClock(T0)
+    event = threading.Event()
+    event.set()
+
+    assert clock.wait(event, 5) is True
+    assert clock.now() == T0
+
+
+def test_virtual_wait_times_out_instantly():
+    clock = VirtualClock(T0)
+
+    assert clock.wait(threading.Event(), 5) is False
+    assert clock.now() == T0 + timedelta(seconds=5)
@@ -0,0 +1,167 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from api.app.routers import events as events_router
+from common.db.models import JobRunStatus
+from common.redis import events
+
+UTC = timezone.utc
+
+
+class FakeStreamClient:
+    def __init__(self, batches, latest="5-0"):
+        self.batches = list(batches)
+        self.latest = latest
+        self.reads = []
+
+    async def xrevrange(self, stream, count):
+        return [(self.latest, {})]
+
+    async def xread(self, streams, block, count):
+        self.reads.append(dict(streams))
+        return self.batches.pop(0) if self.batches else []
+
+
+def collect(gen, n):
+    async def run():
+        items = []
+        async for item in gen:
+            items.append(item)
+            if len(items) == n:
+                break
+        await gen.aclose()
+        return items
+
+    return asyncio.run(run())
+
+
+def entry(event_id, job_id, status="SUCCESS"):
+    return (event_id, {"event": "success", "job_id": str(job_id), "status": status})
+
+
+@pytest.mark.parametrize("event_id", ["0", "0-0", "1700000000000-3"])
+def test_valid_event_ids(event_id):
+    assert events.is_valid_event_id(event_id)
+
+
+@pytest.mark.parametrize("event_id", ["", "$", "-1", "1-", "1-2-3", "abc", "1 "])
+def test_invalid_event_ids(event_id):
+    assert not events.is_valid_event_id(event_id)
+
+
+def test_run_event_fields():
+    run = SimpleNamespace(
+        id=3,
+        job_id=1,
+        status=JobRunStatus.RETRY,
+        attempt_number=1,
+        scheduled_time=datetime(2025, 1, 1, tzinfo=UTC),
+        worker_id=None,
+    )
+    fields = events.run_event("retry", run, at=datetime(2025, 1, 1, 0, 1, tzinfo=UTC))
+
+    assert fields["status"] == "RETRY"
+    assert fields["timestamp"] == "2025-01-01T00:01:00+00:00"
+    assert "worker_id" not in fields
+
+
+def test_job_filter_matches_string_ids_exactly(monkeypatch):
+    fake = FakeStreamClient([[("job_run_events", [entry("6-0", 11), entry("7-0", 1)])]])
+    monkeypatch.setattr(events, "async_redis_client", fake)
+
+    items = collect(events.read_run_events(job_id=1), 1)
+
+    assert [event_id for event_id, _ in items] == ["7-0"]
+    assert fake.reads[0] == {"job_run_events": "5-0"}
+
+
+def test_status_filter_and_cursor_advances_past_skipped(monkeypatch):
+    fake = FakeStreamClient([
+        [("job_run_events", [entry("6-0", 1, "RETRY")])],
+        [("job_run_events", [entry("8-0", 1, "FAILED")])],
+    ])
+    monkeypatch.setattr(events, "async_redis_client", fake)
+
+    items = collect(events.read_run_events(after="0", statuses={"FAILED"}), 1)
+
+    assert items[0][0] == "8-0"
+    assert fake.reads == [{"job_run_events": "0"}, {"job_run_events": "6-0"}]
+
+
+def test_timeout_yields_none(monkeypatch):
+    monkeypatch.setattr(events, "async_redis_client", FakeStreamClient([]))
+
+    assert collect(events.read_run_events(after="0"), 1) == [None]
+
+
+def test_reader_rejects_bad_offset():
+    with pytest.raises(ValueError):
+        collect(events.read_run_events(after="nope"), 1)
+
+
+def make_client():
+    app = FastAPI()
+    app.include_router(events_router.router)
+    return TestClient(app)
+
+
+def test_sse_rejects_bad_offset():
+    client = make_client()
+
+    assert client.get("/events/runs", params={"after": "nope"}).status_code == 400
+    assert client.get("/events/runs", headers={"Last-Event-ID": "x-1"}).status_code == 400
+
+
+def test_websocket_rejects_bad_offset():
+    client = make_client()
+
+    # The handshake completes, so real clients see the close code rather
+    # than an HTTP 403.
+    with client.websocket_connect("/events/runs/ws?after=nope") as ws:
+        with pytest.raises(WebSocketDisconnect) as exc:
+            ws.receive_json()
+
+    assert exc.value.code == 1008
+
+
+def test_websocket_sends_keepalive_when_idle(monkeypatch):
+    monkeypatch.setattr(events, "async_redis_client", FakeStreamClient([]))
+    client = make_client()
+
+    with client.websocket_connect("/events/runs/ws?after=0") as ws:
+        assert ws.receive_json() == {"event": "keepalive"}
+
+
+class FailingStreamClient:
+    async def xrevrange(self, stream, count):
+        raise events.redis.ConnectionError("down")
+
+    async def xread(self, streams, block, count):
+        raise events.redis.ConnectionError("down")
+
+
+def test_sse_reports_redis_failure_in_band(monkeypatch):
+    monkeypatch.setattr(events, "async_redis_client", FailingStreamClient())
+    client = make_client()
+
+    response = client.get("/events/runs", params={"after": "0"})
+
+    assert response.status_code == 200
+    assert response.text.startswith("event: error\n")
+
+
+def test_websocket_closes_1011_on_redis_failure(monkeypatch):
+    monkeypatch.setattr(events, "async_redis_client", FailingStreamClient())
+    client = make_client()
+
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with client.websocket_connect("/events/runs/ws") as ws:
+            ws.receive_json()
+
+    assert exc.value.code == 1011
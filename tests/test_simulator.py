@@ -0,0 +1,129 @@
+import random
+from datetime import datetime, timezone, timedelta
+
+import pytest
+from sqlalchemy.engine import make_url
+
+from common.clock import VirtualClock
+from common.db.session import DATABASE_URL
+from simulator.app.main import Simulation, simulation_engine
+
+UTC = timezone.utc
+T0 = datetime(2025, 1, 1, tzinfo=UTC)
+
+
+def sec(n):
+    return T0 + timedelta(seconds=n)
+
+
+def make_sim(workers=1, now=0):
+    clock = VirtualClock(T0)
+    sim = Simulation(clock, None, workers, 0.0, random.Random(0))
+    clock.advance_to(sec(now))
+    return sim
+
+
+def queued(sim):
+    return sorted((when, handler.__name__) for when, _, handler, _ in sim.queue)
+
+
+def test_no_work_means_no_tick():
+    sim = make_sim()
+    sim.schedule_next_tick()
+
+    assert sim.queue == []
+
+
+def test_tick_snaps_up_to_scheduler_grid():
+    sim = make_sim()
+    sim.next_due = {1: sec(61)}
+    sim.schedule_next_tick()
+
+    assert sim.next_tick_at == sec(62)
+    assert queued(sim) == [(sec(62), "tick_if_current")]
+
+
+def test_tick_on_grid_point_is_kept():
+    sim = make_sim()
+    sim.next_due = {1: sec(60)}
+    sim.schedule_next_tick()
+
+    assert sim.next_tick_at == sec(60)
+
+
+def test_overdue_work_ticks_after_the_current_tick():
+    sim = make_sim(now=10)
+    sim.last_tick_at = sec(10)
+    sim.next_tick_at = sec(10)
+    sim.next_due = {1: sec(4)}
+    sim.schedule_next_tick()
+
+    assert sim.next_tick_at == sec(12)
+
+
+def test_zombie_deadline_ticks_strictly_after():
+    # Reaped only once last_heartbeat_at < now - ZOMBIE_TIMEOUT_SEC.
+    sim = make_sim()
+    sim.zombie_deadlines = [sec(60)]
+    sim.schedule_next_tick()
+
+    assert sim.next_tick_at == sec(62)
+
+
+def test_earlier_tick_supersedes_pending_one():
+    sim = make_sim()
+    sim.next_due = {1: sec(120)}
+    sim.schedule_next_tick()
+    sim.zombie_deadlines = [sec(30)]
+    sim.schedule_next_tick()
+
+    assert sim.next_tick_at == sec(32)
+
+    ticks = []
+    sim.tick = lambda: ticks.append(sim.clock.now())
+    sim.run(until=sec(200))
+
+    # The superseded tick at 120s is skipped.
+    assert ticks == [sec(32)]
+
+
+def test_idle_worker_wakes_on_its_poll_grid():
+    sim = make_sim(workers=1)
+    w = sim.workers[0]
+    w.idle_since = sec(1)
+
+    sim.wake_idle_workers(sec(4))
+
+    assert w.wake_at == sec(5)
+    assert queued(sim) == [(sec(5), "poll")]
+
+
+def test_idle_worker_never_repolls_at_the_same_instant():
+    sim = make_sim(workers=1)
+    w = sim.workers[0]
+    w.idle_since = sec(4)
+
+    sim.wake_idle_workers(sec(4))
+
+    assert w.wake_at == sec(6)
+
+
+@pytest.mark.parametrize("url", [None, ""])
+def test_simulation_requires_its_own_database(url):
+    with pytest.raises(SystemExit):
+        simulation_engine(url)
+
+
+def test_simulation_refuses_the_services_database():
+    with pytest.raises(SystemExit):
+        simulation_engine(DATABASE_URL)
+
+    other_driver = make_url(DATABASE_URL).set(drivername="postgresql", password="other")
+    with pytest.raises(SystemExit):
+        simulation_engine(other_driver.render_as_string(hide_password=False))
+
+
+def test_simulation_engine_targets_the_given_database():
+    engine = simulation_engine("postgresql+psycopg://sim@localhost:5432/miniaf_sim")
+
+    assert engine.url.database == "miniaf_sim"
@@ -0,0 +1,147 @@
+from datetime import datetime, timezone, timedelta
+from types import SimpleNamespace
+
+from common.db.models import JobRunStatus, DURATION_BUCKETS_SEC, LAG_BUCKETS_SEC
+from common.db.stats import bucket_index, hour_bucket, run_outcome_delta
+from api.app.routers.stats import summarize_rollups
+
+UTC = timezone.utc
+T0 = datetime(2025, 1, 1, 12, 0, tzinfo=UTC)
+
+
+def make_run(scheduled_offset=0, started_offset=0, heartbeat_offset=None):
+    return SimpleNamespace(
+        job_id=1,
+        scheduled_time=T0 + timedelta(seconds=scheduled_offset),
+        started_at=T0 + timedelta(seconds=started_offset),
+        last_heartbeat_at=(
+            T0 + timedelta(seconds=heartbeat_offset) if heartbeat_offset is not None else None
+        ),
+    )
+
+
+def make_row(**overrides):
+    row = {
+        "success_count": 0,
+        "failed_count": 0,
+        "retry_count": 0,
+        "zombie_count": 0,
+        "attempts": 0,
+        "duration_sum_sec": 0.0,
+        "lag_sum_sec": 0.0,
+        "duration_hist": [0] * (len(DURATION_BUCKETS_SEC) + 1),
+        "lag_hist": [0] * (len(LAG_BUCKETS_SEC) + 1),
+    }
+    row.update(overrides)
+    return SimpleNamespace(**row)
+
+
+def test_bucket_bounds_are_inclusive():
+    assert bucket_index(DURATION_BUCKETS_SEC, 0) == 0
+    assert bucket_index(DURATION_BUCKETS_SEC, 1) == 0
+    assert bucket_index(DURATION_BUCKETS_SEC, 1.5) == 1
+    assert bucket_index(DURATION_BUCKETS_SEC, 3600) == len(DURATION_BUCKETS_SEC) - 1
+
+
+def test_bucket_overflow():
+    assert bucket_index(DURATION_BUCKETS_SEC, 3601) == len(DURATION_BUCKETS_SEC)
+    assert bucket_index(LAG_BUCKETS_SEC, 10_000) == len(LAG_BUCKETS_SEC)
+
+
+def test_hour_bucket():
+    assert hour_bucket(T0 + timedelta(minutes=59, seconds=59)) == T0
+
+
+def test_delta_success():
+    run = make_run(scheduled_offset=0, started_offset=3)
+    delta = run_outcome_delta(run, JobRunStatus.SUCCESS, T0 + timedelta(seconds=13))
+
+    assert delta["attempts"] == 1
+    assert delta["success_count"] == 1
+    assert delta["duration_sum_sec"] == 10
+    assert delta[("duration_hist", 2)] == 1  # 10s falls in the <=10 bucket
+    assert delta["lag_sum_sec"] == 3
+    assert delta[("lag_hist", 2)] == 1  # 3s falls in the <=5 bucket
+
+
+def test_delta_retry_uses_original_due_time():
+    # The worker has already pushed scheduled_time forward for the retry.
+    run = make_run(scheduled_offset=60, started_offset=2)
+    delta = run_outcome_delta(
+        run, JobRunStatus.RETRY, T0 + timedelta(seconds=2), scheduled_time=T0
+    )
+
+    assert delta["retry_count"] == 1
+    assert delta["lag_sum_sec"] == 2
+
+
+def test_delta_zombie_duration_ends_at_last_heartbeat():
+    run = make_run(started_offset=0, heartbeat_offset=20)
+    delta = run_outcome_delta(
+        run, JobRunStatus.FAILED, T0 + timedelta(seconds=300), zombie=True
+    )
+
+    assert delta["failed_count"] == 1
+    assert delta["zombie_count"] == 1
+    assert delta["duration_sum_sec"] == 20
+
+
+def test_summarize_without_finished_runs():
+    stats = summarize_rollups([make_row(retry_count=2, attempts=2)], window_hours=24)
+
+    assert stats.success_rate is None
+    assert stats.avg_duration_sec is None
+    assert stats.avg_lag_sec is None
+    assert stats.retry_count == 2
+
+
+def test_summarize_adds_rows():
+    a = make_row(success_count=3, attempts=3, duration_sum_sec=30.0)
+    a.duration_hist[2] = 3
+    b = make_row(failed_count=1, attempts=1, duration_sum_sec=90.0)
+    b.duration_hist[len(DURATION_BUCKETS_SEC)] = 1
+
+    stats = summarize_rollups([a, b], window_hours=2, job_id=7)
+
+    assert stats.job_id == 7
+    assert stats.attempts == 4
+    assert stats.success_rate == 0.75
+    assert stats.avg_duration_sec == 30.0
+    assert stats.duration_histogram[2].count == 3
+    assert stats.duration_histogram[-1].le is None
+    assert stats.duration_histogram[-1].count == 1
+
+
+def test_apply_outcomes_is_one_upsert_per_row_in_lock_order():
+    from collections import Counter
+    from unittest.mock import MagicMock
+
+    from common.db.models import FLEET_STATS_SHARDS
+    from common.db.stats import apply_run_outcomes
+
+    db = MagicMock()
+    later = T0 + timedelta(hours=1)
+    apply_run_outcomes(db, [
+        (FLEET_STATS_SHARDS + 2, later, Counter({"attempts": 1})),
+        (2, T0, Counter({"attempts": 1})),
+        (1, T0, Counter({"attempts": 1})),
+        (2, T0, Counter({"attempts": 1})),
+    ])
+
+    keys = []
+    for call in db.execute.call_args_list:
+        params = call.args[0].compile().params
+        table = call.args[0].table.name
+        if table == "fleet_run_stats_hourly":
+            keys.append((table, params["bucket_start"], params["shard"], params["attempts"]))
+        else:
+            keys.append((table, params["job_id"], params["bucket_start"], params["attempts"]))
+
+    assert keys == [
+        ("fleet_run_stats_hourly", T0, 1, 1),
+        ("fleet_run_stats_hourly", T0, 2, 2),
+        ("fleet_run_stats_hourly", later, 2, 1),
+        ("job_run_stats_hourly", 1, T0, 1),
+        ("job_run_stats_hourly", 2, T0, 2),
+        ("job_run_stats_hourly", FLEET_STATS_SHARDS + 2, later, 1),
+    ]
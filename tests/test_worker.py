@@ -0,0 +1,62 @@
+import random
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from worker.app import main as worker
+
+
+def make_db(job):
+    db = MagicMock()
+    db.execute.return_value.scalar_one.return_value = job
+    return db
+
+
+def test_begin_attempt_returns_none_when_nothing_is_due(monkeypatch):
+    monkeypatch.setattr(worker, "claim_job", lambda db, worker_id, clock: None)
+
+    assert worker.begin_attempt(MagicMock()) is None
+
+
+@pytest.mark.parametrize("probability, fails", [(0.0, False), (1.0, True)])
+def test_begin_attempt_decides_outcome_up_front(monkeypatch, probability, fails):
+    job_run = SimpleNamespace(id=3, job_id=1)
+    job = SimpleNamespace(id=1, failure_probability=probability)
+    started = []
+    monkeypatch.setattr(worker, "claim_job", lambda db, worker_id, clock: job_run)
+    monkeypatch.setattr(worker, "start_job", lambda *args: started.append(args))
+
+    attempt = worker.begin_attempt(make_db(job), "w1", rng=random.Random(0))
+
+    assert attempt == worker.Attempt(job=job, job_run=job_run, fails=fails)
+    assert started[0][:3] == (job, job_run, "w1")
+
+
+def test_end_attempt_always_leaves_running_set(monkeypatch):
+    removed = []
+    monkeypatch.setattr(worker.redis_client, "srem", lambda key, run_id: removed.append(run_id))
+
+    def boom(*args):
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(worker, "complete_job_run", boom)
+    attempt = worker.Attempt(job=SimpleNamespace(id=1), job_run=SimpleNamespace(id=3), fails=False)
+
+    with pytest.raises(RuntimeError):
+        worker.end_attempt(MagicMock(), attempt, "w1")
+
+    assert removed == [3]
+
+
+def test_end_attempt_reports_success_flag(monkeypatch):
+    calls = []
+    monkeypatch.setattr(worker.redis_client, "srem", lambda key, run_id: None)
+    monkeypatch.setattr(
+        worker, "complete_job_run",
+        lambda db, job, job_run, succeeded, worker_id, clock: calls.append(succeeded) or True,
+    )
+    attempt = worker.Attempt(job=SimpleNamespace(id=1), job_run=SimpleNamespace(id=3), fails=True)
+
+    assert worker.end_attempt(MagicMock(), attempt, "w1") is True
+    assert calls == [False]
@@ -1,18 +1,22 @@
 import os
-import time
 import json
 import random
 import threading
-from datetime import datetime, timezone, timedelta
+from dataclasses import dataclass
+from datetime import timezone, timedelta
 
 from sqlalchemy import select
 from sqlalchemy.exc import ProgrammingError
 
+from common.clock import Clock, SYSTEM_CLOCK
 from common.db.session import SessionLocal
 from common.db.models import Job, JobRun, JobRunStatus
+from common.db.stats import record_run_outcome
 from common.db.utils import wait_for_db
 from common.logging.logger import StructuredLogger
+from common.redis import keys
 from common.redis.client import redis_client
+from common.redis.events import publish_run_event, run_event
 
 logger = StructuredLogger(
     name="worker",
@@ -29,53 +33,68 @@ WORKER_TTL_SEC = 15
 WORKER_ID = get_worker_id()
 
 
-class JobFailureRandomException(Exception):
-    pass
-
-
-def refresh_worker_presence(current_job_run_id=None):
+def refresh_worker_presence(
+    current_job_run_id=None,
+    worker_id: str = WORKER_ID,
+    clock: Clock = SYSTEM_CLOCK,
+):
     redis_client.setex(
-        f"worker:{WORKER_ID}",
+        f"worker:{worker_id}",
         WORKER_TTL_SEC,
         json.dumps(
             {
-                "worker_id": WORKER_ID,
-                "last_seen": datetime.now(UTC).isoformat(),
+                "worker_id": worker_id,
+                "last_seen": clock.now().isoformat(),
                 "current_job_run_id": current_job_run_id,
             }
         ),
     )
 
-def heartbeat_loop(job_run_id: int, stop_event: threading.Event):
+
+def touch_heartbeat(
+    db,
+    job_run_id: int,
+    worker_id: str = WORKER_ID,
+    clock: Clock = SYSTEM_CLOCK,
+):
+    db.execute(
+        select(JobRun)
+        .where(JobRun.id == job_run_id)
+        .with_for_update()
+    ).scalar_one().\
+    last_heartbeat_at = clock.now().replace(microsecond=0)
+
+    db.commit()
+
+    logger.log(
+        event="heartbeat",
+        job_run_id=job_run_id,
+        worker_id=worker_id,
+    )
+
+
+def heartbeat_loop(
+    job_run_id: int,
+    stop_event: threading.Event,
+    worker_id: str = WORKER_ID,
+    clock: Clock = SYSTEM_CLOCK,
+):
     """Periodically updates heartbeat for a running job_run."""
     while not stop_event.is_set():
-        refresh_worker_presence(job_run_id)
+        refresh_worker_presence(job_run_id, worker_id, clock)
 
         db = SessionLocal()
         try:
-            db.execute(
-                select(JobRun)
-                .where(JobRun.id == job_run_id)
-                .with_for_update()
-            ).scalar_one().\
-            last_heartbeat_at = datetime.now(UTC).replace(microsecond=0)
-
-            db.commit()
-
-            logger.log(
-                event="heartbeat",
-                job_run_id=job_run.id,
-                worker_id=WORKER_ID,
-            )
+            touch_heartbeat(db, job_run_id, worker_id, clock)
         except Exception:
             db.rollback()
         finally:
             db.close()
 
-        stop_event.wait(HEARTBEAT_INTERVAL_SEC)
+        clock.wait(stop_event, HEARTBEAT_INTERVAL_SEC)
 
 
-def claim_job(db):
+def claim_job(db, worker_id: str = WORKER_ID, clock: Clock = SYSTEM_CLOCK):
 
     with db.begin():
         job_run = (
@@ -83,9 +102,9 @@ def claim_job(db):
                 select(JobRun)
                 .where(
                     JobRun.status.in_([JobRunStatus.PENDING, JobRunStatus.RETRY]),
-                    JobRun.scheduled_time <= datetime.now(UTC),
+                    JobRun.scheduled_time <= clock.now(),
                 )
-                .order_by(JobRun.scheduled_time)
+                .order_by(JobRun.scheduled_time, JobRun.id)
                 .with_for_update(skip_locked=True)
                 .limit(1)
             )
@@ -96,118 +115,236 @@ def claim_job(db):
             return None
 
         job_run.status = JobRunStatus.RUNNING
-        job_run.started_at = datetime.now(UTC).replace(microsecond=0)
-        job_run.last_heartbeat_at = datetime.now(UTC).replace(microsecond=0)
-        job_run.worker_id = WORKER_ID
+        job_run.started_at = clock.now().replace(microsecond=0)
+        job_run.last_heartbeat_at = clock.now().replace(microsecond=0)
+        job_run.worker_id = worker_id
 
-        redis_client.sadd("running_job_runs", job_run.id)
+        redis_client.sadd(keys.RUNNING_JOB_RUNS, job_run.id)
 
         logger.log(
             event="job_claimed",
             job_run_id=job_run.id,
             job_id=job_run.job_id,
-            worker_id=WORKER_ID,
+            worker_id=worker_id,
             status=job_run.status,
             attempt_number=job_run.attempt_number,
         )
+        claimed = run_event("claimed", job_run, clock.now())
 
-        return job_run
+    publish_run_event(claimed, logger)
+    return job_run
 
 
-def execute_job(db, job: Job, job_run: JobRun):
+def start_job(
+    job: Job,
+    job_run: JobRun,
+    worker_id: str = WORKER_ID,
+    clock: Clock = SYSTEM_CLOCK,
+):
     logger.log(
         event="job_started",
         job_run_id=job_run.id,
         job_id=job.id,
-        worker_id=WORKER_ID,
+        worker_id=worker_id,
         attempt_number=job_run.attempt_number,
     )
+    publish_run_event(run_event("started", job_run, clock.now()), logger)
 
-    rnd = random.random()
 
-    if rnd < job.failure_probability:
-        raise JobFailureRandomException()
+def attempt_fails(job: Job, rng=random) -> bool:
+    return rng.random() < job.failure_probability
 
-    time.sleep(job.execution_time_sec)
 
+def complete_job_run(
+    db,
+    job: Job,
+    job_run: JobRun,
+    succeeded: bool,
+    worker_id: str = WORKER_ID,
+    clock: Clock = SYSTEM_CLOCK,
+):
+    """
+    Record the outcome of one attempt: SUCCESS, RETRY or FAILED.
 
-wait_for_db()
-refresh_worker_presence()
-logger.log(event="worker_booted", worker_id=WORKER_ID)
+    Returns False, changing nothing, if the run is no longer ours -- the
+    reaper already took it over as a zombie and counted the attempt.
+    """
 
-while True:
-    db = SessionLocal()
-    try:
-        job_run = claim_job(db)
+    db.execute(
+        select(JobRun)
+        .where(JobRun.id == job_run.id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    ).scalar_one()
 
-        if not job_run:
-            time.sleep(POLL_INTERVAL_SEC)
-            continue
-
-        job = db.execute(
-            select(Job).where(Job.id == job_run.job_id)
-        ).scalar_one()
-
-        stop_event = threading.Event()
-        hb_thread = threading.Thread(
-            target=heartbeat_loop,
-            args=(job_run.id, stop_event),
-            daemon=True,
+    if job_run.status != JobRunStatus.RUNNING or job_run.worker_id != worker_id:
+        db.rollback()
+        logger.log(
+            event="job_run_lost",
+            job_run_id=job_run.id,
+            job_id=job.id,
+            worker_id=worker_id,
+            status=job_run.status,
+        )
+        return False
+
+    if succeeded:
+        job_run.status = JobRunStatus.SUCCESS
+        job_run.finished_at = clock.now().replace(microsecond=0)
+        record_run_outcome(db, job_run, job_run.status, job_run.finished_at)
+        finished = run_event("success", job_run, clock.now())
+        db.commit()
+        publish_run_event(finished, logger)
+
+        logger.log(
+            event="job_success",
+            job_run_id=job_run.id,
+            job_id=job.id,
+            worker_id=worker_id,
+            duration_sec=job.execution_time_sec,
+        )
+        return True
+
+    job_run.attempt_number += 1
+    job_run.finished_at = clock.now().replace(microsecond=0)
+    due_at = job_run.scheduled_time
+
+    if job_run.attempt_number <= job.max_retries:
+        job_run.status = JobRunStatus.RETRY
+        job_run.scheduled_time = clock.now().replace(microsecond=0) + timedelta(
+            seconds=job.retry_delay_sec
+        )
+        logger.log(
+            event="job_retry",
+            job_run_id=job_run.id,
+            job_id=job.id,
+            worker_id=worker_id,
+            attempt_number=job_run.attempt_number,
+            next_run_at=job_run.scheduled_time,
+        )
+    else:
+        job_run.status = JobRunStatus.FAILED
+        logger.log(
+            event="job_failed",
+            job_run_id=job_run.id,
+            job_id=job.id,
+            worker_id=worker_id,
+            attempts=job_run.attempt_number,
+            reason="max_retries_exceeded",
+        )
+
+    record_run_outcome(
+        db,
+        job_run,
+        job_run.status,
+        job_run.finished_at,
+        scheduled_time=due_at,
+    )
+    finished = run_event(
+        "retry" if job_run.status == JobRunStatus.RETRY else "failed",
+        job_run,
+        clock.now(),
+    )
+    db.commit()
+    publish_run_event(finished, logger)
+    return True
+
+
+@dataclass
+class Attempt:
+    job: Job
+    job_run: JobRun
+    fails: bool  # decided up front; a failing attempt ends immediately
+
+
+def begin_attempt(
+    db,
+    worker_id: str = WORKER_ID,
+    clock: Clock = SYSTEM_CLOCK,
+    rng=random,
+) -> Attempt | None:
+    """Claim the next due run and start it. Returns None if nothing is due."""
+
+    job_run = claim_job(db, worker_id, clock)
+    if not job_run:
+        return None
+
+    job = db.execute(
+        select(Job).where(Job.id == job_run.job_id)
+    ).scalar_one()
+
+    start_job(job, job_run, worker_id, clock)
+    return Attempt(job=job, job_run=job_run, fails=attempt_fails(job, rng))
+
+
+def load_attempt(db, job_run_id: int, fails: bool) -> Attempt:
+    """Re-load an in-flight attempt in a fresh session."""
+
+    job_run = db.execute(
+        select(JobRun).where(JobRun.id == job_run_id)
+    ).scalar_one()
+    job = db.execute(
+        select(Job).where(Job.id == job_run.job_id)
+    ).scalar_one()
+    return Attempt(job=job, job_run=job_run, fails=fails)
+
+
+def end_attempt(
+    db,
+    attempt: Attempt,
+    worker_id: str = WORKER_ID,
+    clock: Clock = SYSTEM_CLOCK,
+) -> bool:
+    """Record the attempt's outcome and drop it from the running set."""
+
+    try:
+        return complete_job_run(
+            db, attempt.job, attempt.job_run, not attempt.fails, worker_id, clock
         )
-        hb_thread.start()
+    finally:
+        redis_client.srem(keys.RUNNING_JOB_RUNS, attempt.job_run.id)
+
+
+def run_worker(worker_id: str = WORKER_ID):
+    # Always real time: the heartbeat thread would spin on a VirtualClock.
+    # The simulator drives begin_attempt / end_attempt on a VirtualClock.
+    clock = SYSTEM_CLOCK
+    wait_for_db()
+    refresh_worker_presence(worker_id=worker_id, clock=clock)
+    logger.log(event="worker_booted", worker_id=worker_id)
 
+    while True:
+        db = SessionLocal()
         try:
-            execute_job(db, job, job_run)
-
-            job_run.status = JobRunStatus.SUCCESS
-            job_run.finished_at = datetime.now(UTC).replace(microsecond=0)
-            db.commit()
-
-            logger.log(
-                event="job_success",
-                job_run_id=job_run.id,
-                job_id=job.id,
-                worker_id=WORKER_ID,
-                duration_sec=job.execution_time_sec,
-            )
+            attempt = begin_attempt(db, worker_id, clock)
 
-        except JobFailureRandomException:
-            job_run.attempt_number += 1
-            job_run.finished_at = datetime.now(UTC).replace(microsecond=0)
+            if not attempt:
+                clock.sleep(POLL_INTERVAL_SEC)
+                continue
 
-            if job_run.attempt_number <= job.max_retries:
-                job_run.status = JobRunStatus.RETRY
-                job_run.scheduled_time = datetime.now(UTC).replace(microsecond=0) + timedelta(
-                    seconds=job.retry_delay_sec
-                )
-                logger.log(
-                    event="job_retry",
-                    job_run_id=job_run.id,
-                    job_id=job.id,
-                    worker_id=WORKER_ID,
-                    attempt_number=job_run.attempt_number,
-                    next_run_at=job_run.scheduled_time,
-                )
-            else:
-                job_run.status = JobRunStatus.FAILED
-                logger.log(
-                    event="job_failed",
-                    job_run_id=job_run.id,
-                    job_id=job.id,
-                    worker_id=WORKER_ID,
-                    attempts=job_run.attempt_number,
-                    reason="max_retries_exceeded",
-                )
+            stop_event = threading.Event()
+            hb_thread = threading.Thread(
+                target=heartbeat_loop,
+                args=(attempt.job_run.id, stop_event, worker_id, clock),
+                daemon=True,
+            )
+            hb_thread.start()
 
-            db.commit()
+            try:
+                if not attempt.fails:
+                    clock.sleep(attempt.job.execution_time_sec)
+                end_attempt(db, attempt, worker_id, clock)
 
+            finally:
+                stop_event.set()
+                refresh_worker_presence(worker_id=worker_id, clock=clock)
+
+        except ProgrammingError:
+            db.rollback()
+            clock.sleep(POLL_INTERVAL_SEC)
         finally:
-            stop_event.set()
-            redis_client.srem("running_job_runs", job_run.id)
-            refresh_worker_presence()
+            db.close()
 
-    except ProgrammingError:
-        db.rollback()
-        time.sleep(POLL_INTERVAL_SEC)
-    finally:
-        db.close()
+
+if __name__ == "__main__":
+    run_worker()